@@ -4,47 +4,67 @@ from shared_locks import get_lock
 
 
 class AudioSettings:
+    """
+    Equalizer and gain settings shared between the UI and the audio thread.
+
+    Readers never take the lock: every update publishes a new object by rebinding
+    the attribute, which is atomic in CPython, so a reader always sees either the
+    old or the new value. The lock only serializes writers (copy-on-write).
+    """
 
     def __init__(self):
         self._lock = get_lock("audio")  # Get the file lock
-        self._eq_bands = DEFAULT_EQ_BANDS
+        self._eq_bands = dict(DEFAULT_EQ_BANDS)
+        self._eq_version = 0  # Bumped on every EQ change so consumers can cache filters
         self.global_gain = getattr(constant, "DEFAULT_GLOBAL_GAIN", 0.0)
+        self.use_fixed_point = getattr(constant, "DEFAULT_USE_FIXED_POINT", False)
 
     # Equalization Accessors
+    @property
+    def eq_version(self):
+        """Monotonic counter incremented every time the EQ bands change."""
+        return self._eq_version
+
     @property
     def eq_bands(self):
-        with self._lock:
-            return self._eq_bands
+        """Current EQ bands. Treat as read-only, use the mutators to change them."""
+        return self._eq_bands
 
     @eq_bands.setter
     def eq_bands(self, bands):
         """Set all equalizer bands at once."""
+        if not isinstance(bands, dict):
+            raise ValueError("Bands must be a dictionary {band_id: (freq, gain)}")
         with self._lock:
-            if isinstance(bands, dict):
-                self._eq_bands = bands
-            else:
-                raise ValueError("Bands must be a dictionary {band_id: (freq, gain)}")
+            self._eq_bands = dict(bands)
+            self._eq_version += 1
 
     def add_eq_band(self, band_id, freq, gain, q=1.0):
         """Add or update a single EQ band."""
         with self._lock:
-            self._eq_bands[band_id] = (freq, gain, q)
+            bands = dict(self._eq_bands)
+            bands[band_id] = (freq, gain, q)
+            self._eq_bands = bands
+            self._eq_version += 1
 
     def remove_eq_band(self, band_id):
         """Remove a single EQ band."""
         with self._lock:
             if band_id in self._eq_bands:
-                del self._eq_bands[band_id]
+                bands = dict(self._eq_bands)
+                del bands[band_id]
+                self._eq_bands = bands
+                self._eq_version += 1
 
     def clear_eq_bands(self):
         """Clear all EQ bands."""
         with self._lock:
-            self._eq_bands.clear()
+            self._eq_bands = {}
+            self._eq_version += 1
 
     @property
     def global_gain(self):
-        with self._lock:
-            return self._global_gain
+        return self._global_gain
 
     @global_gain.setter
     def global_gain(self, value):
@@ -52,5 +72,16 @@ class AudioSettings:
             self._global_gain = value
 
 
+    @property
+    def use_fixed_point(self):
+        """Run the equalizer on the integer kernel when Numba is available."""
+        return self._use_fixed_point
+
+    @use_fixed_point.setter
+    def use_fixed_point(self, value):
+        with self._lock:
+            self._use_fixed_point = bool(value)
+
+
 # Global instance of AudioSettings (Singleton)
 audio_set: AudioSettings = AudioSettings()
\ No newline at end of file
@@ -1,10 +1,10 @@
 import numpy as np
-import time
+import threading
 import recording_settings
 import pyaudio
+import soundfile as sf
 import sound_processing
 import audio_settings
-from collections.abc import Mapping
 
 
 
@@ -16,7 +16,8 @@ class AudioStreamer:
     This class is designed for managing audio streams using the PyAudio library. It allows
     recording of audio data, applying real-time processing such as equalization, and playback.
     The class provides methods to start, stop, and manage the lifecycle of audio streaming,
-    along with callback mechanisms for processing the streaming data.
+    along with a writer thread that processes the streaming data and feeds a blocking
+    output stream.
 
     Attributes
     ----------
@@ -37,10 +38,8 @@ class AudioStreamer:
         File path of the recorded file.
     channels : int
         Number of audio channels (e.g., 2 for stereo).
-    full_audio : bytes
-        Full-length audio data in bytes.
-    frame_start_index : int
-        Tracks the current audio frame position during streaming.
+    full_audio : np.ndarray
+        Full-length input audio samples (int16).
     """
     def __init__(self, rec_set = recording_settings.RecordingSettings(), audio_set = audio_settings.AudioSettings()) :
         """
@@ -53,7 +52,7 @@ class AudioStreamer:
         ----------
         rec_set : RecordingSettings, optional
             An object that provides configuration settings for the audio recording.
-            Includes sampling frequency, frame_size size, input data bytes, file name,
+            Includes sampling frequency, frame_size size, input data, file name,
             and file path. If not provided, defaults to an instance of the
             RecordingSettings class.
         """
@@ -63,96 +62,121 @@ class AudioStreamer:
         self.audio_set = audio_set
         self.audio = pyaudio.PyAudio()
         self.stream = None
-        self.frame_start_index = 0
+        self._writer = None
+        self._saver = None
+        self._stop_event = threading.Event()
+        self._playback_done = threading.Event()
+        # Set by the writer whenever the saver has something new to look at
+        self._frames_queued = threading.Event()
+        self._full_audio_view = None
+        self._full_audio_length = 0
+        self._cursor = 0
 
         #Record Settings Class Variables
         self.rate = rec_set.sampling_freq
         self.frame_size = rec_set.frame_size
         self.audio_file = rec_set.file_name
         self.file_path = rec_set.full_path_name
-        self.full_audio = rec_set.in_data_bytes
+        self.full_audio = rec_set.in_data
         self.channels = rec_set.channels
         self.bit_depth = rec_set.bit_depth
         self.byte_depth = int(self.bit_depth / 8)
 
-    def callback(self,in_data: bytes | None,frame_count: int,time_info: Mapping[str, float],status: int) -> tuple[bytes | None, int] | None:
+        # Equalizer keeps its filter states between frames
+        self.equalizer = sound_processing.Equalizer(self.rate, self.channels, self.audio_set)
+        # Output buffer reused by every frame instead of allocating one per frame
+        self._out_buf = np.empty((self.frame_size, self.channels), dtype=np.int16)
 
+    def process_frame(self, frame_count: int) -> np.ndarray:
         """
-        Processes a frame_size of audio data, applies transformations, and streams the processed audio data.
+        Equalizes the next frame of audio data and queues it for saving.
 
-        This method serves as a callback function for handling audio data chunks during
-        real-time audio streaming. It fetches a segment of audio data from an internal
-        buffer, reshapes it for stereo audio (if applicable), updates the frame position,
-        and optionally applies transformations like equalization. The processed audio
-        data is subsequently queued for further processing or saving and returned as
-        a bytes object for streaming purposes.
+        This method fetches the segment of audio data at the stream cursor from the
+        full input buffer, advances the cursor past it, applies the equalizer and
+        stores the processed frame in the recording queue. It runs on the writer
+        thread, never on the PortAudio thread.
 
         Parameters
         ----------
-        in_data : bytes
-            The audio input data, typically provided by the audio input stream.
         frame_count : int
-            The number of frames to process in the current callback call.
-        time_info : dict
-            Timing information dictionary, provided by the audio back-end, containing
-            data about the timing of the audio stream.
-        status : int
-            The status flag indicating the current status of the audio stream.
+            The number of frames to process.
 
         Returns
         -------
-        tuple
-            A tuple containing:
-                - out_data_bytes (bytes): The processed audio data in bytes format,
-                  ready to be streamed back through the audio output stream.
-                - int: A constant indicating whether the audio stream should continue
-                  (e.g., `pyaudio.paContinue`).
-
+        np.ndarray
+            The processed int16 samples, shorter than `frame_count` frames at the end
+            of the input data and empty once it has been reached.
         """
 
-        # Convert Full Audio file in bytes to np array
-        full_audio = np.frombuffer(self.rec_set.in_data_bytes, dtype=np.int16)
-        full_audio_length = len(full_audio)
-
-        # Calculate start and end indices for this frame
-        start = self.frame_start_index
-        end = start + (frame_count * self.channels)
-
-        # Ensure the frame end index is smaller than the end of data
-        if end > full_audio_length:
-            print("End of audio reached. (@callback)")
-            end = full_audio_length
-
-        # Separates the full audio data inputted to the callback in frames
-        frame_np = full_audio[start:end]
+        # Frames are consumed in order: take what is left up to frame_count, a zero-copy
+        # slice of rows, and move the cursor past it
+        start = self._cursor
+        n = min(frame_count, self._full_audio_length - start)
+        frame_np = self._full_audio_view[start:start + n]
+        self._cursor = start + n
 
-        # Update position tracker for the next callback
-        self.frame_start_index = end
+        #frame_equalized = sound_processing.band_pass_filter(frame_np, 1000 , 7000, self.rate, channels=self.channels).astype(np.int16)
+        frame_equalized = self.equalizer.process(frame_np, out=self._out_buf[:n])
+        assert frame_equalized.dtype == np.int16
 
+        # Copy into the recording ring buffer for later saving
+        if not self.rec_set.add_to_audio_queue(frame_equalized):
+            print("Recording queue full, frames dropped. (@process_frame)")
+        self._frames_queued.set()
 
+        return frame_equalized
 
-        #frame_equalized = sound_processing.band_pass_filter(frame_np, 1000 , 7000, self.rate).astype(np.int16)
-        frame_equalized = sound_processing.apply_equalizer(frame_np, self.rate,self.bit_depth).astype(np.int16)
-
-        # Store data in queue for later saving
-        self.rec_set.add_to_audio_queue(frame_equalized)
-
-        # Convert output data to bytes
-        out_data_bytes = frame_equalized.tobytes()
+    def _write_frames(self):
+        """
+        Writer thread body: processes the input frame by frame and pushes it to the stream.
 
-        # Streams raw equalized data
-        return out_data_bytes, pyaudio.paContinue
+        `stream.write()` blocks in PortAudio's C code until there is room in the output
+        buffer, so no Python code runs on the realtime audio thread and the processing
+        is paced by the device. Only this thread advances the stream cursor.
+        """
+        try:
+            while not self._stop_event.is_set():
+                frame_equalized = self.process_frame(self.frame_size)
+                if frame_equalized.size == 0:
+                    print("End of audio reached. (@_write_frames)")
+                    break
+                self.stream.write(frame_equalized.tobytes())
+        finally:
+            self._playback_done.set()
+            # Wake the saver so it drains the tail and sees playback is done
+            self._frames_queued.set()
+
+    def _save_frames(self, audio_file):
+        """
+        Saver thread body: drains the recording queue into the output file while streaming.
 
+        Frames are encoded as they are produced, so memory stays bounded by how far the
+        saver lags behind instead of growing with the length of the session. It sleeps
+        until the writer queues frames, and closes the file once playback is done and
+        the queue is empty.
+        """
+        try:
+            while True:
+                # Checked before draining: once set, no frame can be queued after the drain
+                playback_done = self._playback_done.is_set()
+                # Cleared before draining, so frames queued during the drain wake the next wait
+                self._frames_queued.clear()
+                if (frames := self.rec_set.get_from_audio_queue()) is not None:
+                    audio_file.write(frames)
+                if playback_done:
+                    break
+                self._frames_queued.wait()
+        finally:
+            audio_file.close()
 
     def start_stream(self):
         """
         Starts the audio stream with the specified configurations.
 
-        This method initializes and starts the audio stream using the
-        PyAudio interface. It configures the stream with the provided
-        audio settings like format, channels, rate, input/output mode, and
-        frame_size size. The `stream_callback` function is used to handle the
-        data processing during the streaming process.
+        This method opens a blocking output stream using the PyAudio interface,
+        configured with the provided audio settings like format, channels, rate
+        and frame_size size, and starts the writer thread that feeds it processed
+        frames.
 
         Attributes
         ----------
@@ -172,18 +196,37 @@ class AudioStreamer:
             rate=self.rate,
             output=True,
             frames_per_buffer=self.frame_size,
-            stream_callback= self.callback,
         )
+        # (frames, channels) view of the interleaved input, built once per stream and
+        # only copied if it is not contiguous already, so frames are plain row slices
+        self._full_audio_view = np.ascontiguousarray(self.rec_set.in_data).reshape(-1, self.channels)
+        self._full_audio_length = self._full_audio_view.shape[0]
+        self._cursor = 0
+
+        # Output file is encoded incrementally by the saver thread from a fresh queue
+        self.rec_set.reset_audio_queue()
+        audio_file = sf.SoundFile(self.file_path, mode="w", samplerate=self.rate,
+                                  channels=self.channels, format="FLAC")
+
         print("Starting stream... (@start_stream)")
         self.stream.start_stream()
 
+        self._stop_event.clear()
+        self._playback_done.clear()
+        self._frames_queued.clear()
+        self._writer = threading.Thread(target=self._write_frames, daemon=True)
+        self._saver = threading.Thread(target=self._save_frames, args=(audio_file,), daemon=True)
+        self._writer.start()
+        self._saver.start()
+
     def streaming(self):
         """
         streaming(self)
 
-        Manages real-time audio streaming that includes recording and live playback in
-        a continuous loop. The method runs until interrupted, ensuring proper execution
-        and handling of exceptions during the streaming process.
+        Manages real-time audio streaming that includes recording and live playback
+        until the writer thread runs out of input data or the user interrupts it,
+        then stops the stream, ensuring proper handling of exceptions during the
+        streaming process.
 
         Raises
         ------
@@ -193,14 +236,16 @@ class AudioStreamer:
             Captures and outputs any unexpected errors that occur during streaming.
         """
         try:
-            while self.stream.is_active():
+            # Returns as soon as the writer sets the event. The timeout only bounds how
+            # long a Ctrl+C can go unnoticed where lock waits are not interruptible (Windows)
+            while not self._playback_done.wait(timeout=1.0):
                 #print("Recording and live playback in progress... (@streaming)")
-                time.sleep(0.1)
+                pass
         except KeyboardInterrupt:
             print("Streaming stopped via KeyboardInterrupt. (@streaming)")
-            self.stop_stream()
         except Exception as e:
             print(f"Unexpected streaming error: {e} (@streaming)")
+        self.stop_stream()
 
     def stop_stream(self):
         """
@@ -218,11 +263,21 @@ class AudioStreamer:
         audio.terminate : Closes the PortAudio instance, releasing resources.
 
         """
+        self._stop_event.set()
+        if self._writer:
+            self._writer.join()
+            self._writer = None
+        if self._saver:
+            print("Saving recorded audio... (@stop_stream)")
+            self._saver.join()
+            self._saver = None
         if self.stream:
             print("Stopping stream... (@stop_stream)")
             self.stream.stop_stream()
             print("Closing stream... (@stop_stream)")
             self.stream.close()
+            self.stream = None
         if self.audio:
             print("Closing PortAudio... (@stop_stream)")
-            self.audio.terminate()
\ No newline at end of file
+            self.audio.terminate()
+            self.audio = None
\ No newline at end of file
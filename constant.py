@@ -1,13 +1,20 @@
+from types import MappingProxyType
+
 # Recording Constants
 DEFAULT_BIT_DEPTH = 24
 MAX_FREQ = DEFAULT_SAMPLING_FREQ = 192000
 MIN_FREQ = 5000
 DEFAULT_CHUNK_SIZE = 1024
 DEFAULT_CHANNELS = 2
+AUDIO_QUEUE_SECONDS = 10  # Capacity of the recorded-audio ring buffer
 
 # Audio Constants
-DEFAULT_EQ_BANDS = {
+# Read-only: every AudioSettings instance works on its own copy
+DEFAULT_EQ_BANDS = MappingProxyType({
     1: (4000, -6, 1),
-}
+})
+
+DEFAULT_GLOBAL_GAIN = 0.0
 
-DEFAULT_GLOBAL_GAIN = 0.0
\ No newline at end of file
+# Integer EQ path (needs Numba), trades some accuracy for no float conversion
+DEFAULT_USE_FIXED_POINT = False
\ No newline at end of file
@@ -0,0 +1,191 @@
+import numpy as np
+import scipy.signal as signal
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:  # Numba is optional, callers fall back to SciPy
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# The kernels are compiled with nogil=True: once called they run as native code
+# without holding the GIL, so the writer thread never stalls the other threads
+# (saver, UI) while it filters, and they never stall it.
+
+# Fixed-point format of the integer EQ kernel: coefficients are scaled by
+# 2**COEF_SHIFT and samples carry SAMPLE_SHIFT extra fractional bits through
+# the cascade. States and products are int64 in units of 2**(COEF_SHIFT +
+# SAMPLE_SHIFT). That is enough for bands well above the low end of the rate,
+# but the states of narrow low bands (e.g. a few hundred Hz and below at
+# 192 kHz) grow past int64, so every cascade is checked with
+# `fixed_point_fits` before it may run on the kernel.
+COEF_SHIFT = 24
+SAMPLE_SHIFT = 6
+
+
+@njit(cache=True, nogil=True, fastmath=True, parallel=True)
+def sosfilt_channels(sos, x, zi, y):
+    """
+    Run an SOS cascade over every column (channel) of `x` and write the result to `y`.
+
+    `x` and `y` have shape (frames, channels), the interleaved layout viewed as 2-D.
+    Uses the transposed direct form II, the same structure as `scipy.signal.sosfilt`
+    with `axis=0`, so `zi` (shape (n_sections, 2, channels)) is interchangeable with
+    the state SciPy returns. `zi` is updated in place.
+    """
+    n_sections = sos.shape[0]
+    for c in prange(x.shape[1]):
+        for n in range(x.shape[0]):
+            v = x[n, c]
+            for s in range(n_sections):
+                out = sos[s, 0] * v + zi[s, 0, c]
+                zi[s, 0, c] = sos[s, 1] * v - sos[s, 4] * out + zi[s, 1, c]
+                zi[s, 1, c] = sos[s, 2] * v - sos[s, 5] * out
+                v = out
+            y[n, c] = v
+
+
+@njit(cache=True, nogil=True, fastmath=True)
+def sosfilt_stereo(sos, x, zi, y):
+    """
+    Two-channel specialisation of `sosfilt_channels`, same arguments and result.
+
+    Both channels go through each biquad in the same step, so there is no loop or
+    thread dispatch over the channels and the two independent recurrences can
+    overlap in the pipeline.
+    """
+    n_sections = sos.shape[0]
+    for n in range(x.shape[0]):
+        vl = x[n, 0]
+        vr = x[n, 1]
+        for s in range(n_sections):
+            outl = sos[s, 0] * vl + zi[s, 0, 0]
+            outr = sos[s, 0] * vr + zi[s, 0, 1]
+            zi[s, 0, 0] = sos[s, 1] * vl - sos[s, 4] * outl + zi[s, 1, 0]
+            zi[s, 0, 1] = sos[s, 1] * vr - sos[s, 4] * outr + zi[s, 1, 1]
+            zi[s, 1, 0] = sos[s, 2] * vl - sos[s, 5] * outl
+            zi[s, 1, 1] = sos[s, 2] * vr - sos[s, 5] * outr
+            vl = outl
+            vr = outr
+        y[n, 0] = vl
+        y[n, 1] = vr
+
+
+@njit(cache=True, nogil=True, fastmath=True)
+def saturate_to_int16(x, out):
+    """Saturate the float samples of `x` to the int16 range and store them in `out`."""
+    for i in range(x.size):
+        v = x[i]
+        if v > 32767.0:
+            out[i] = 32767
+        elif v < -32768.0:
+            out[i] = -32768
+        else:
+            out[i] = np.int16(v)
+
+
+def quantize_sos(sos):
+    """
+    Quantize an SOS cascade for `eq_fixed_point`.
+
+    Narrow band passes put almost all of their gain in one tiny numerator, which
+    would round to zero, so the numerator gain is first spread evenly over the
+    sections. The response is unchanged, only the rounding error is.
+    """
+    sos = np.array(sos, dtype=np.float64)
+    scale = np.abs(sos[:, :3]).max(axis=1)
+    if np.all(scale > 0):
+        sos[:, :3] *= (np.prod(scale) ** (1 / len(sos))) / scale[:, None]
+    return np.round(sos * (1 << COEF_SHIFT)).astype(np.int64)
+
+
+def fixed_point_fits(sos, sos_q):
+    """
+    Check that `sos_q`, the quantized `sos`, is safe to run on `eq_fixed_point`.
+
+    The rounded coefficients must keep the response within 1e-3 (-60 dB) of the
+    float design. And no section state, nor any product added into one, may
+    overflow for any full-scale int16 input: each is bounded by the L1 norm of
+    its impulse response times 32768, in the kernel's units, and the bound must
+    stay a factor 2 below the int64 range, which also covers the rounding and
+    the sum of the bands.
+    """
+    quantized = sos_q / (1 << COEF_SHIFT)
+    error = signal.sosfreqz(quantized, worN=8192)[1] - signal.sosfreqz(sos, worN=8192)[1]
+    if np.abs(error).max() > 1e-3:
+        return False
+
+    # Long enough for the slowest pole to decay below 1e-12 of its start
+    radius = max(np.abs(np.roots(section[3:])).max() for section in quantized)
+    if radius >= 1:
+        return False
+    length = int(np.log(1e-12) / np.log(radius)) + 1 if radius > 0 else 3
+    v = np.zeros(length)
+    v[0] = 1.0
+    peak = 0.0
+    for section in quantized:
+        b0, b1, b2, _, a1, a2 = section
+        y = signal.sosfilt(section, v)
+        z1 = b2 * v - a2 * y
+        z0 = b1 * v - a1 * y
+        z0[1:] += z1[:-1]
+        in_out = max(np.abs(v).sum(), np.abs(y).sum())
+        peak = max(peak, np.abs(z0).sum(), np.abs(z1).sum(), np.abs(section).sum() * in_out)
+        v = y
+    scale = 32768 * (1 << (COEF_SHIFT + SAMPLE_SHIFT))
+    return peak * scale < 2 ** 62
+
+
+@njit(cache=True, nogil=True, parallel=True)
+def eq_fixed_point(sos_q, x, zi, out):
+    """
+    Integer version of the equalizer: `out` = `x` + the sum of every band's cascade.
+
+    `x` and `out` are int16 (frames, channels) views, `sos_q` holds the bands'
+    coefficients quantized with `quantize_sos`, shape (bands, sections, 6), and
+    `zi` the int64 states with shape (bands, sections, 2, channels), updated in
+    place. Uses int64 multiply-accumulates and saturates the result to int16.
+    """
+    n_bands = sos_q.shape[0]
+    n_sections = sos_q.shape[1]
+    coef_round = np.int64(1) << (COEF_SHIFT - 1)
+    sample_round = np.int64(1) << (SAMPLE_SHIFT - 1)
+    for c in prange(x.shape[1]):
+        for n in range(x.shape[0]):
+            dry = np.int64(x[n, c]) << SAMPLE_SHIFT
+            acc = dry
+            for b in range(n_bands):
+                v = dry
+                for s in range(n_sections):
+                    w = (sos_q[b, s, 0] * v + zi[b, s, 0, c] + coef_round) >> COEF_SHIFT
+                    zi[b, s, 0, c] = sos_q[b, s, 1] * v - sos_q[b, s, 4] * w + zi[b, s, 1, c]
+                    zi[b, s, 1, c] = sos_q[b, s, 2] * v - sos_q[b, s, 5] * w
+                    v = w
+                acc += v
+            y = (acc + sample_round) >> SAMPLE_SHIFT
+            if y > 32767:
+                out[n, c] = 32767
+            elif y < -32768:
+                out[n, c] = -32768
+            else:
+                out[n, c] = y
+
+
+def warm_up():
+    """Compile the kernels ahead of time so the audio path never waits on the JIT."""
+    if not NUMBA_AVAILABLE:
+        return
+    sos = np.zeros((1, 6))
+    sos[0, 3] = 1.0
+    x = np.zeros((1, 2), dtype=np.float32)
+    sosfilt_channels(sos, x, np.zeros((1, 2, 2)), np.empty_like(x))
+    sosfilt_stereo(sos, x, np.zeros((1, 2, 2)), np.empty_like(x))
+    saturate_to_int16(x.reshape(-1), np.empty(x.size, dtype=np.int16))
+    x_int = np.zeros((1, 2), dtype=np.int16)
+    eq_fixed_point(np.zeros((1, 1, 6), dtype=np.int64), x_int, np.zeros((1, 1, 2, 2), dtype=np.int64),
+                   np.empty_like(x_int))
@@ -1,6 +1,6 @@
+import os
 import soundfile as sf
 import recording_settings
-import sound_processing
 import audio_stream
 import audio_settings
 
@@ -11,25 +11,30 @@ if __name__ == "__main__":
 
     input_file = "musica1.wav"
 
-    bit_depth_in, channels_in, sample_in = sound_processing.get_audio_properties(input_file)
-    print("Input File Params", bit_depth_in, channels_in, sample_in)
+    # Open the input once: header properties and samples come from the same handle
+    with sf.SoundFile(input_file) as audio_file:
+        bit_depth_in = audio_file.subtype_info
+        channels_in = audio_file.channels
+        samplerate = audio_file.samplerate
+        print("Input File Params", bit_depth_in, channels_in, samplerate)
 
-    rec_set.bit_depth = 16
-
-    input_data, samplerate = sf.read(input_file, dtype='int16', always_2d=True)
+        input_data = audio_file.read(dtype='int16', always_2d=True)
     #input_data = input_data / 0x7FFF
 
-    if samplerate != sample_in:
-        print("Warning: Input file sample rate does not match the expected sample rate given by"
-              "@get_audio_properties.")
-        exit(-1)
+    rec_set.bit_depth = 16
+
     print("Read File Params", input_data.shape[1], samplerate)
-    rec_set.in_data_bytes = input_data.tobytes()
+    # Keep the samples as an array, the streamer slices it directly
+    rec_set.in_data = input_data
 
     #Update sampling frequency and number of channels in rec_set
     rec_set.sampling_freq = samplerate
     rec_set.channels = channels_in
 
+    # The streamer encodes the processed audio to this file while it plays
+    rec_set.directory = os.getcwd()
+    rec_set.file_name = "output.flac"
+
 
     #Creat a Streaming Class that receives our recording settings Class as Parameter
     audio_streamer = audio_stream.AudioStreamer(rec_set, audio_set)
@@ -40,12 +45,4 @@ if __name__ == "__main__":
     print("Recording and live playback in progress... (@main)")
     audio_streamer.streaming()
 
-    # Retrieve processed audio after stopping the stream
-    recorded_audio = rec_set.get_concatenated_audio()
-    #Convert recorded audio to np array
-    recorded_raw = recorded_audio.tobytes()
-
-    #Write the queue to a file
-    sf.write("output.flac", recorded_audio, rec_set.sampling_freq, format='FLAC')
-
     print("Audio recording saved successfully.")
\ No newline at end of file
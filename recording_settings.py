@@ -1,11 +1,19 @@
-import queue
 from threading import Lock
 import constant
 import os
 import numpy as np
+from ring_buffer import RingBuffer
 
 
 class RecordingSettings:
+    """
+    Recording configuration and the recorded-audio queue.
+
+    Getters of single attributes read them without the lock: an attribute read is
+    atomic in CPython and these are polled from the audio threads. Setters and
+    compound reads still take the lock.
+    """
+
     def __init__(self):
         self._lock = Lock()
 
@@ -16,86 +24,105 @@ class RecordingSettings:
         self._file_name = "default_audio.flac"  # Default file name
         self._session_number = 0  # Default session number
         self._session_name = "Default_Session"  # Default session name
-        self._frame_size = 1024
-        self._in_data_bytes = None
-        self._audio_queue = queue.Queue()
+        self._frame_size = getattr(constant, "DEFAULT_CHUNK_SIZE", 1024)  # Frames per buffer
+        self._channels = getattr(constant, "DEFAULT_CHANNELS", 2)  # Default number of channels
+        self._in_data = None
+        self._audio_queue = None
+        self.reset_audio_queue()
 
         # Recording controls
         self._recording_active = False
         self._recording_start_time = None
         self._recording_duration = 0
 
+    def reset_audio_queue(self):
+        """
+        Allocate an empty audio queue for the current sampling rate and channels.
+
+        The queue is a preallocated single-producer/single-consumer ring buffer that
+        holds `constant.AUDIO_QUEUE_SECONDS` of audio, so adding frames on the audio
+        path never allocates nor locks. Call it before streaming starts.
+        """
+        seconds = getattr(constant, "AUDIO_QUEUE_SECONDS", 10)
+        with self._lock:
+            self._audio_queue = RingBuffer(int(seconds * self._sampling_freq), self._channels)
+
     @property
     def audio_queue_size(self):
-        """Returns the size of the audio queue in a thread-safe manner."""
-        with self._lock:
-            return self._audio_queue.qsize()
+        """Returns the number of queued frames without locking, the ring buffer indices are atomic."""
+        return self._audio_queue.read_available
 
     @property
     def audio_queue(self):
-        """Get frame_size size."""
-        with self._lock:
-            return self._audio_queue
+        """Get the audio queue."""
+        return self._audio_queue
 
     @property
     def is_audio_queue_empty(self):
-        """Checks if the audio queue is empty in a thread-safe manner."""
-        with self._lock:
-            return self._audio_queue.empty()
+        """Checks if the audio queue is empty without locking."""
+        return self._audio_queue.read_available == 0
 
     def add_to_audio_queue(self, item):
-        """Adds an item to the audio queue in a thread-safe manner."""
-        with self._lock:
-            self._audio_queue.put(item)
+        """
+        Copies interleaved samples into the audio queue without locking (producer side).
+
+        Returns False if the queue was full and frames had to be dropped.
+        """
+        return self._audio_queue.write(item) * self._audio_queue.channels == item.size
 
     def get_from_audio_queue(self):
-        """Gets and removes an item from the audio queue in a thread-safe manner."""
-        with self._lock:
-            try:
-                return self._audio_queue.get_nowait()
-            except queue.Empty:
-                return None
+        """Gets and removes all queued frames without locking (consumer side), None if empty."""
+        if self._audio_queue.read_available == 0:
+            return None
+        return self._audio_queue.read()
 
     def get_concatenated_audio(self):
-        """Concatenate and return all audio data (NumPy arrays) in the queue."""
-        with self._lock:
-            if self._audio_queue.empty():  # Check queue's emptiness
-                return np.array([], dtype=np.int16)  # Return empty array
-            return np.concatenate(list(self._audio_queue.queue))  # Concatenate queue contents safely
+        """Drain the queue and return all its audio data as a (frames, channels) array."""
+        return self._audio_queue.read()
 
     @property
     def frame_size(self):
         """Get frame_size size."""
-        with self._lock:
-            return self._frame_size
+        return self._frame_size
 
     @frame_size.setter
     def frame_size(self, value):
-        """Set frame_size size."""
+        """Set frame_size size, the frames_per_buffer of the stream."""
         if not isinstance(value, int) or value <= 0:
             raise ValueError("Chunk size must be a positive integer.")
         with self._lock:
             self._frame_size = value
 
     @property
-    def in_data_bytes(self):
-        """Get in_data_bits."""
+    def channels(self):
+        """Get number of channels."""
+        return self._channels
+
+    @channels.setter
+    def channels(self, value):
+        """Set number of channels."""
+        if not isinstance(value, int) or value <= 0:
+            raise ValueError("Channels must be a positive integer.")
         with self._lock:
-            return self._in_data_bytes
+            self._channels = value
+
+    @property
+    def in_data(self):
+        """Get input audio samples."""
+        return self._in_data
 
-    @in_data_bytes.setter
-    def in_data_bytes(self, value):
-        """Set in_data_bits."""
-        if value is not None and not isinstance(value, (bytes, bytearray)):
-            raise ValueError("in_data_bits must be a bytes object or None.")
+    @in_data.setter
+    def in_data(self, value):
+        """Set input audio samples, an int16 array kept as is (no copy to bytes)."""
+        if value is not None and not (isinstance(value, np.ndarray) and value.dtype == np.int16):
+            raise ValueError("in_data must be an int16 NumPy array or None.")
         with self._lock:
-            self._in_data_bytes = value
+            self._in_data = value
 
     @property
     def bit_depth(self):
         """Get bit depth."""
-        with self._lock:
-            return self._bit_depth
+        return self._bit_depth
 
     @bit_depth.setter
     def bit_depth(self, value):
@@ -108,8 +135,7 @@ class RecordingSettings:
     @property
     def sampling_freq(self):
         """Get sampling frequency."""
-        with self._lock:
-            return self._sampling_freq
+        return self._sampling_freq
 
     @sampling_freq.setter
     def sampling_freq(self, fs):
@@ -122,8 +148,7 @@ class RecordingSettings:
     @property
     def directory(self):
         """Get output directory."""
-        with self._lock:
-            return self._directory
+        return self._directory
 
     @directory.setter
     def directory(self, directory_path):
@@ -138,8 +163,7 @@ class RecordingSettings:
     @property
     def file_name(self):
         """Get file name."""
-        with self._lock:
-            return self._file_name
+        return self._file_name
 
     @file_name.setter
     def file_name(self, name):
@@ -161,8 +185,7 @@ class RecordingSettings:
     @property
     def session_number(self):
         """Get session number."""
-        with self._lock:
-            return self._session_number
+        return self._session_number
 
     @session_number.setter
     def session_number(self, n_session):
@@ -175,8 +198,7 @@ class RecordingSettings:
     @property
     def session_name(self):
         """Get session name."""
-        with self._lock:
-            return self._session_name
+        return self._session_name
 
     @session_name.setter
     def session_name(self, name):
@@ -0,0 +1,65 @@
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Preallocated single-producer/single-consumer ring buffer of audio frames.
+
+    Frames are copied into one array allocated up front, so writing never
+    allocates and never takes a lock. Each side only ever advances its own index
+    (the producer `_write_idx`, the consumer `_read_idx`) and publishes it with a
+    single attribute store, which is atomic under the GIL, after the copy is done.
+
+    Attributes
+    ----------
+    capacity : int
+        Number of frames the buffer holds.
+    channels : int
+        Number of samples per frame.
+    """
+
+    def __init__(self, capacity, channels, dtype=np.int16):
+        self.capacity = capacity
+        self.channels = channels
+        self._buffer = np.zeros((capacity, channels), dtype=dtype)
+        # Total frames written/read since creation, the position is the index modulo capacity
+        self._write_idx = 0
+        self._read_idx = 0
+
+    @property
+    def read_available(self):
+        """Number of frames that can be read."""
+        return self._write_idx - self._read_idx
+
+    @property
+    def write_available(self):
+        """Number of frames that can be written without overwriting unread ones."""
+        return self.capacity - self.read_available
+
+    def write(self, data):
+        """
+        Copy interleaved samples or (frames, channels) data into the buffer (producer side).
+
+        Frames that do not fit are dropped. Returns the number of frames written.
+        """
+        frames = data.reshape(-1, self.channels)
+        n = min(len(frames), self.write_available)
+        start = self._write_idx % self.capacity
+        first = min(n, self.capacity - start)
+        np.copyto(self._buffer[start:start + first], frames[:first])
+        np.copyto(self._buffer[:n - first], frames[first:n])
+        self._write_idx += n
+        return n
+
+    def read(self, n=None):
+        """Remove and return up to `n` frames (all available by default) as (frames, channels)."""
+        available = self.read_available
+        n = available if n is None else min(n, available)
+        start = self._read_idx % self.capacity
+        first = min(n, self.capacity - start)
+        # Copy both sides of the wrap straight into one destination, no intermediate list
+        frames = np.empty((n, self.channels), dtype=self._buffer.dtype)
+        np.copyto(frames[:first], self._buffer[start:start + first])
+        np.copyto(frames[first:], self._buffer[:n - first])
+        self._read_idx += n
+        return frames